@@ -1,9 +1,17 @@
+import functools
+import hashlib
 import json
 import os
 import re
+import shlex
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 # Regex is taken from https://semver.org/#is-there-a-suggested-regular-expression-regex-to-check-a-semver-string
@@ -14,14 +22,17 @@ TAG_VERSIONS_REGEX = r"((0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)){1}\s((0|[1-9]\
 DEFAULT_VERSION_PREFIX = "Version:"
 DEFAULT_GROUP_CONFIG = []
 POINT_RELEASE_PATTERN = r'^(\d+)\.(\d+)\.(\d+)$'
+POINT_RELEASE_RE = re.compile(POINT_RELEASE_PATTERN)
 POINT_RELEASE_LABEL = "point release"
 POINT_RELEASE_TITLE = "Point Release"
+CACHE_DIRECTORY = os.path.expanduser('~/.cache/changelog-ci')
 
 
 class ChangelogCI:
     """The class that generates, commits and/or comments changelog"""
 
     github_api_url = 'https://api.github.com'
+    github_graphql_url = 'https://api.github.com/graphql'
 
     def __init__(
         self, repository,
@@ -34,9 +45,66 @@ class ChangelogCI:
         self.config["tag_versions_regex"] = TAG_VERSIONS_REGEX
         self.token = token
 
-        title, number = self._get_pull_request_title_and_number(event_path)
-        self.pull_request_title = title
-        self.pull_request_number = number
+        # compile the patterns once so every later
+        # call reuses the same compiled objects
+        self._pr_title_re = _compile_cached(
+            self.config['pull_request_title_regex']
+        )
+        self._tag_re = _compile_cached(self.config['tag_versions_regex'])
+        self._version_re = _compile_cached(self.config['version_regex'])
+
+        # one combined pass over the pull request title extracts the
+        # title validation, version and tags matches together; the
+        # lookaheads each find their own leftmost match just like the
+        # three separate searches would
+        try:
+            self._combined_re = _compile_cached(
+                '(?s)'
+                f"(?=.*?(?P<prtitle>{self.config['pull_request_title_regex']}))"
+                f"(?=.*?(?P<ver>{self.config['version_regex']}))"
+                f"(?=.*?(?P<tags>{self.config['tag_versions_regex']}))"
+            )
+        except re.error:
+            # user provided patterns do not always compose, e.g. when
+            # they contain anchors inside groups or duplicate group
+            # names, fall back to the three separate searches
+            self._combined_re = None
+
+        # reuse one session for every API call so the TLS handshake
+        # is paid once, and retry transient GitHub API failures
+        retry_options = {
+            'total': 5,
+            'backoff_factor': 0.5,
+            'status_forcelist': [429, 502, 503, 504],
+            'respect_retry_after_header': True
+        }
+        self._session = requests.Session()
+        self._session.headers.update(self._get_request_headers())
+        self._session.mount('https://', HTTPAdapter(
+            max_retries=Retry(**retry_options)
+        ))
+        # urllib3 does not retry POST by default, but the GraphQL
+        # queries are read-only and carry all the API traffic, so
+        # they get their own adapter that does; the non-idempotent
+        # comment-creation POST stays on the default method filter
+        self._session.mount(self.github_graphql_url, HTTPAdapter(
+            max_retries=Retry(
+                allowed_methods=Retry.DEFAULT_ALLOWED_METHODS.union(
+                    {'POST'}
+                ),
+                **retry_options
+            )
+        ))
+
+        # tag commit dates never change once a tag is cut,
+        # remember resolved ones for the lifetime of the run
+        self._tag_date_cache = {}
+
+        # the event payload is only parsed by ``run`` once it is
+        # clear that a changelog will actually be generated
+        self._event_path = event_path
+        self.pull_request_title = None
+        self.pull_request_number = None
 
     @staticmethod
     def _default_config():
@@ -53,11 +121,7 @@ class ChangelogCI:
     @staticmethod
     def _get_changelog_line(item):
         """Generate each line of changelog"""
-        return ("* [#{number}]({url}): {title}\n").format(
-            number=item['number'],
-            url=item['url'],
-            title=item['title']
-        )
+        return f"* [#{item['number']}]({item['url']}): {item['title']}\n"
 
     @staticmethod
     def _get_pull_request_title_and_number(event_path):
@@ -70,6 +134,14 @@ class ChangelogCI:
 
         return title, number
 
+    def _load_event(self):
+        """Loads pull request title and number from the event payload"""
+        title, number = self._get_pull_request_title_and_number(
+            self._event_path
+        )
+        self.pull_request_title = title
+        self.pull_request_number = number
+
     def _parse_config(self, config_file):
         """parse the config file if not provided use default config"""
         if config_file:
@@ -92,8 +164,7 @@ class ChangelogCI:
 
     def _validate_pull_request(self):
         """Check if changelog should be generated for this pull request"""
-        pattern = re.compile(self.config['pull_request_title_regex'])
-        match = pattern.search(self.pull_request_title)
+        match = self._pr_title_re.search(self.pull_request_title)
 
         if match:
             return True
@@ -101,8 +172,7 @@ class ChangelogCI:
         return
 
     def _validate_tags(self):
-        pattern = re.compile(self.config['tag_versions_regex'])
-        match = pattern.search(self.pull_request_title)
+        match = self._tag_re.search(self.pull_request_title)
         if match:
             return match.group()
         return
@@ -112,27 +182,13 @@ class ChangelogCI:
 
     def _get_version_number(self):
         """Get version number from the pull request title"""
-        pattern = re.compile(self.config['version_regex'])
-        match = pattern.search(self.pull_request_title)
+        match = self._version_re.search(self.pull_request_title)
 
         if match:
             return match.group()
 
         return
 
-    def _get_file_mode(self):
-        """Gets the mode that the changelog file should be opened in"""
-        if os.path.exists(self.filename):
-            # if the changelog file exists
-            # opens it in read-write mode
-            file_mode = 'r+'
-        else:
-            # if the changelog file does not exists
-            # opens it in read-write mode
-            # but creates the file first also
-            file_mode = 'w+'
-        return file_mode
-
     def _get_request_headers(self):
         """Get headers for GitHub API request"""
         headers = {
@@ -147,229 +203,521 @@ class ChangelogCI:
 
         return headers
 
-    def _get_release_at_tag(self, tag):
-        """Using GitHub API gets latest release date"""
-        url = (
-            '{base_url}/repos/{repo_name}/git/ref/tags/{gitTag}'
-        ).format(base_url=self.github_api_url, repo_name=self.repository, gitTag=tag)
+    @staticmethod
+    def _cache_path(key):
+        """Gets the on-disk cache file path for a cache key"""
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(CACHE_DIRECTORY, f'{digest}.json')
 
-        response = requests.get(url, headers=self._get_request_headers())
+    def _read_cache(self, key):
+        """Reads cached data for a key, returns None on a cache miss"""
+        try:
+            with open(self._cache_path(key), 'r') as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return None
 
-        commit_url = ''
-        published_date = ''
+    def _write_cache(self, key, data):
+        """Writes data to the on-disk cache, caching is best effort"""
+        try:
+            os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+            with open(self._cache_path(key), 'w') as cache_file:
+                json.dump(data, cache_file)
+        except OSError:
+            pass
 
-        if response.status_code == 200:
-            response_data = response.json()
-            # get the published date of the latest release
-            _print_output('warning', response_data)
-            commit_url = response_data["object"]["url"]
-            _print_output('warning', commit_url)
-        else:
-            # if there is no previous release API will return 404 Not Found
+    @staticmethod
+    def _get_tag_commit_date(ref_data):
+        """Gets the commit date a tag ref points at
+
+        Lightweight tags point directly at a commit,
+        annotated tags point at a tag object which in
+        turn points at the commit.
+        """
+        if not ref_data:
+            return ''
+
+        target = ref_data.get('target') or {}
+
+        if 'committedDate' not in target:
+            # annotated tag, follow it to the commit
+            target = target.get('target') or {}
+
+        return target.get('committedDate', '')
+
+    @staticmethod
+    def _extract_data(pull_request_nodes):
+        """Builds the changelog items for a page of pull request nodes
+
+        A single comprehension builds the whole page so the caller can
+        extend its list once instead of appending item by item. The
+        label set is precomputed for the matching in ``_parse_data``.
+        """
+        return [
+            {
+                'title': item['title'],
+                'number': item['number'],
+                'url': item['url'],
+                'labels_set': frozenset(
+                    label['name'] for label in item['labels']['nodes']
+                )
+            }
+            for item in pull_request_nodes
+        ]
+
+    def _post_graphql(self, query, variables):
+        """Sends one GraphQL request and returns the raw response"""
+        return self._session.post(
+            self.github_graphql_url,
+            json={'query': query, 'variables': variables}
+        )
+
+    def _decode_graphql(self, response, allow_partial=False):
+        """Decodes a GraphQL response body exactly once
+
+        Returns the decoded payload, or None after printing an error
+        message if the request failed. Callers work with the decoded
+        dict so no response body is ever parsed twice. With
+        ``allow_partial`` a payload that reports errors but still
+        carries repository data is kept instead of discarded.
+        """
+        if response.status_code != 200:
             msg = (
-                f'Could not find any tag release for '
-                f'{tag}, status code: {response.status_code}'
+                f'GitHub GraphQL API request for {self.repository} '
+                f'failed. response status code: {response.status_code}'
             )
-            _print_output('warning', msg)
+            _print_output('error', msg)
+            return None
+
+        if os.environ.get('RUNNER_DEBUG'):
+            # full response bodies are debug-only noise,
+            # only ship them to the log when the workflow
+            # runs with debug logging enabled
+            _print_output('debug', response.text)
+
+        # orjson parses the raw bytes several times faster
+        # than the stdlib decoder behind ``response.json()``
+        response_data = orjson.loads(response.content)
+
+        if response_data.get('errors'):
+            if allow_partial and (
+                (response_data.get('data') or {}).get('repository')
+            ):
+                # aliased queries report errors for individual fields
+                # while the rest resolve fine, keep what resolved
+                msg = (
+                    f'GitHub GraphQL API request for {self.repository} '
+                    f'returned partial data. '
+                    f'errors: {response_data["errors"]}'
+                )
+                _print_output('warning', msg)
+                return response_data
 
-        response = requests.get(commit_url, headers=self._get_request_headers())
-        if response.status_code == 200:
-            response_data = response.json()
-            # get the published date of the latest release
-            _print_output('warning', response_data)
-            try:
-                published_date = response_data["committer"]["date"]
-            except KeyError:
-                commit_url = response_data["object"]["url"]
-                response = requests.get(commit_url, headers=self._get_request_headers())
-                if response.status_code == 200:
-                    response_data = response.json()
-                    # get the published date of the latest release
-                    _print_output('warning', response_data)
-                    published_date = response_data["committer"]["date"]
-        else:
-            # if there is no previous release API will return 404 Not Found
+            msg = (
+                f'GitHub GraphQL API request for {self.repository} '
+                f'failed. errors: {response_data["errors"]}'
+            )
+            _print_output('error', msg)
+            return None
+
+        return response_data
+
+    def _local_pr_numbers_between(self, start, end):
+        """Gets merged pull request numbers from the local git history
+
+        The repository is already checked out and unshallowed, so the
+        merge commits between two tags can be listed with one local
+        ``git log`` instead of rate-limited API calls.
+        """
+        result = subprocess.run(
+            ['git', 'log', '--merges', '--pretty=%s', f'{start}..{end}'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+
+        if result.returncode != 0:
+            # one or both tags are not available locally
+            return []
+
+        # only ``Merge pull request #N from ...`` subjects; an
+        # unanchored ``#N`` would also pick up issue references and
+        # branch names. Deduplicated keeping the newest-first ordering
+        return list(dict.fromkeys(
+            int(number) for number in re.findall(
+                r'^Merge pull request #(\d+)', result.stdout, re.MULTILINE
+            )
+        ))
+
+    def _graphql_prs_by_number(self, pr_numbers):
+        """Gets title and labels for specific pull requests in one query
+
+        Every pull request number is aliased into a single GraphQL
+        request instead of being fetched one call at a time.
+        """
+        owner, repo = self.repository.split('/')
+
+        aliases = ' '.join(
+            f'pr{number}: pullRequest(number: {number}) '
+            '{ title number url labels(first: 100) { nodes { name } } }'
+            for number in pr_numbers
+        )
+        query = (
+            'query ($owner: String!, $name: String!) { '
+            'repository(owner: $owner, name: $name) { ' + aliases + ' } }'
+        )
+
+        # a number that is not a pull request only fails its own
+        # alias, the rest of the batch is still usable
+        response_data = self._decode_graphql(
+            self._post_graphql(query, {'owner': owner, 'name': repo}),
+            allow_partial=True
+        )
+
+        if response_data is None:
+            return []
+
+        return self._extract_data(
+            node for node in response_data['data']['repository'].values()
+            if node
+        )
+
+    @staticmethod
+    def _local_tag_date(tag):
+        """Gets the commit date a local tag points at, '' if not found
+
+        The repository is already fetched, so a local ref lookup
+        resolves the date with zero API cost. The date is formatted in
+        UTC to stay comparable with the API's mergedAt timestamps.
+        Annotated tags fill the dereferencing ``*`` field, lightweight
+        tags the plain one, so exactly one of the two is non-empty.
+        """
+        date_format = 'format-local:%Y-%m-%dT%H:%M:%SZ'
+        result = subprocess.run(
+            [
+                'git', 'for-each-ref',
+                f'--format=%(*committerdate:{date_format})'
+                f'%(committerdate:{date_format})',
+                f'refs/tags/{tag}'
+            ],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+            env=dict(os.environ, TZ='UTC')
+        )
+
+        if result.returncode != 0:
+            return ''
+
+        return result.stdout.strip()
+
+    def _resolve_tag_dates(self, start, end):
+        """Resolves the commit dates both tags point at, memoized
+
+        Dates already resolved during this run are served from the
+        in-memory cache. Tags present locally are resolved with one
+        ``git for-each-ref`` each; only the rest go to the API and
+        they share a single aliased GraphQL query.
+        """
+        for tag in (start, end):
+            if tag not in self._tag_date_cache:
+                local_date = self._local_tag_date(tag)
+                if local_date:
+                    self._tag_date_cache[tag] = local_date
+
+        missing = [
+            tag for tag in (start, end)
+            if tag not in self._tag_date_cache
+        ]
+
+        if missing:
+            owner, repo = self.repository.split('/')
+
+            # tag names only contain digits and dots here, they are
+            # matched out of the pull request title by TAG_VERSIONS_REGEX
+            aliases = ' '.join(
+                f'tag{index}: ref(qualifiedName: "refs/tags/{tag}") '
+                '{ target { ... on Commit { committedDate } '
+                '... on Tag { target { ... on Commit { committedDate } } } } }'
+                for index, tag in enumerate(missing)
+            )
+            query = (
+                'query ($owner: String!, $name: String!) { '
+                'repository(owner: $owner, name: $name) { ' + aliases + ' } }'
+            )
+
+            response_data = self._decode_graphql(self._post_graphql(
+                query, {'owner': owner, 'name': repo}
+            ))
+
+            if response_data is not None:
+                repository_data = response_data['data']['repository'] or {}
+
+                for index, tag in enumerate(missing):
+                    self._tag_date_cache[tag] = self._get_tag_commit_date(
+                        repository_data.get(f'tag{index}')
+                    )
+
+        return (
+            self._tag_date_cache.get(start, ''),
+            self._tag_date_cache.get(end, '')
+        )
+
+    def _graphql_pr_between_tags(self, start, end):
+        """Gets the merged pull requests between two tags over GraphQL
+
+        Pages through the merged pull requests and filters them client
+        side against the tag commit dates, instead of hitting the
+        rate-limited Search API. Returns the items together with a
+        flag telling whether they are the exact tag-range result:
+        False when pagination failed midway or when date filtering was
+        skipped, so callers never cache a truncated or unfiltered list.
+        """
+        owner, repo = self.repository.split('/')
+
+        query = """
+        query ($owner: String!, $name: String!, $cursor: String) {
+          repository(owner: $owner, name: $name) {
+            pullRequests(
+              states: MERGED, baseRefName: "master", first: 100,
+              orderBy: {field: UPDATED_AT, direction: DESC}, after: $cursor
+            ) {
+              pageInfo { hasNextPage endCursor }
+              nodes {
+                title
+                number
+                url
+                mergedAt
+                labels(first: 100) { nodes { name } }
+              }
+            }
+          }
+        }
+        """
+        variables = {
+            'owner': owner,
+            'name': repo,
+            'cursor': None
+        }
+
+        items = []
+        start_date, end_date = self._resolve_tag_dates(start, end)
+        # an unfiltered list is a degraded-mode superset of the tag
+        # range, it must never be cached under the tag-range key
+        cacheable = bool(start_date and end_date)
+
+        if not cacheable:
+            # if there is no release for the repo then
+            # do not filter by merged date
             msg = (
                 f'Could not find any tag release for '
-                f'{tag}, status code: {response.status_code}'
+                f'{start} or {end}, '
+                f'skipping merged date filtering.'
             )
             _print_output('warning', msg)
-        return published_date
 
-    def _extract_data(self, items, response_data):
-        for item in response_data['items']:
-            data = {
-                'title': item['title'],
-                'number': item['number'],
-                'url': item['html_url'],
-                'labels': [label['name'] for label in item['labels']]
-            }
-            items.append(data)
-
-    def _get_data_from_pr(self, items, response_data, response):
-        if response_data['total_count'] > 0:
-            self._extract_data(items, response_data)
-            while 'next' in response.links.keys():
-                response = requests.get(response.links['next']['url'], headers=self._get_request_headers())
-                response_data = response.json()
-                self._extract_data(items, response_data)
-        else:
+        # cursor pagination is inherently sequential, but the next
+        # page can already be in flight while the current one is
+        # being filtered and extracted
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(
+                self._post_graphql, query, dict(variables)
+            )
+
+            while future is not None:
+                response_data = self._decode_graphql(future.result())
+                future = None
+
+                if response_data is None:
+                    cacheable = False
+                    break
+
+                repository_data = response_data['data']['repository']
+                pull_requests = repository_data['pullRequests']
+                page_info = pull_requests['pageInfo']
+
+                if page_info['hasNextPage']:
+                    # request the next page before processing this one
+                    variables['cursor'] = page_info['endCursor']
+                    future = executor.submit(
+                        self._post_graphql, query, dict(variables)
+                    )
+
+                nodes = pull_requests['nodes']
+
+                if start_date and end_date:
+                    # ISO-8601 UTC timestamps compare correctly as strings
+                    nodes = [
+                        node for node in nodes
+                        if start_date <= node['mergedAt'] <= end_date
+                    ]
+
+                items.extend(self._extract_data(nodes))
+
+        if not items:
             msg = (
                 f'There was no pull request '
                 f'made on {self.repository} after last release.'
             )
             _print_output('error', msg)
-        return items
+
+        return items, cacheable
 
     def _get_pull_requests_beetween_tags(self, start, end):
         """Get all the merged pull request between tags"""
-        start_date = self._get_release_at_tag(start)
-        end_date = self._get_release_at_tag(end)
-        if start_date and end_date:
-            merged_date_filter = f'merged:{start_date}..{end_date}'
-        else:
-            # if there is no release for the repo then
-            # do not filter by merged date
-            merged_date_filter = ''
-
-        url = (
-            '{base_url}/search/issues'
-            '?q=repo:{repo_name}+'
-            'is:pr+'
-            'is:merged+'
-            'base:master+'
-            '{merged_date_filter}'
-            '&sort=merged'
-            '&page=1'
-        ).format(
-            base_url=self.github_api_url,
-            repo_name=self.repository,
-            merged_date_filter=merged_date_filter
-        )
-
-        items = []
+        if not self.token:
+            # Token is required by the GitHub GraphQL API
+            # if not provided exit with error message
+            msg = (
+                "Could not get pull requests. "
+                "``GITHUB_TOKEN`` is required for this operation. "
+                "Please add ``GITHUB_TOKEN`` to your workflow yaml file. "
+                "Look at Changelog CI's documentation for more information."
+            )
+            _print_output('error', msg)
+            return []
 
-        response = requests.get(url, headers=self._get_request_headers())
+        # the set of pull requests between two cut tags never changes,
+        # so reruns can skip the API and its rate-limit budget entirely
+        cache_key = f'{self.repository}:{start}:{end}'
+        cached_items = self._read_cache(cache_key)
 
-        if response.status_code == 200:
-            response_data = response.json()
-            self._get_data_from_pr(items, response_data, response)
-        else:
+        if cached_items is not None:
             msg = (
-                f'Could not get pull requests for '
-                f'{self.repository} from GitHub API. '
-                f'response status code: {response.status_code}'
+                f'Using cached pull requests for '
+                f'{start}..{end} on {self.repository}.'
             )
-            _print_output('error', msg)
+            _print_output('warning', msg)
+            for item in cached_items:
+                item['labels_set'] = frozenset(item.pop('labels'))
+            return cached_items
+
+        items = []
+        cacheable = True
+        pr_numbers = self._local_pr_numbers_between(start, end)
+
+        if pr_numbers:
+            items = self._graphql_prs_by_number(pr_numbers)
+
+        if not items:
+            # squash merges leave no merge commits behind and the tags
+            # may be missing locally, fall back to querying the API
+            # for the whole tag range
+            items, cacheable = self._graphql_pr_between_tags(start, end)
+
+        # only exact tag-range results may be cached; a list truncated
+        # by a mid-pagination failure or inflated by skipped date
+        # filtering would be served on every rerun otherwise
+        if items and cacheable:
+            # sets are not JSON serializable, store the labels as a list
+            self._write_cache(cache_key, [
+                {
+                    'title': item['title'],
+                    'number': item['number'],
+                    'url': item['url'],
+                    'labels': sorted(item['labels_set'])
+                }
+                for item in items
+            ])
 
         return items
 
     def _parse_data(self, version, pull_request_data, is_point_release: bool):
         """Parse the pull requests data and return a writable data structure"""
-        string_data = (
-            '# ' + self.config['header_prefix'] + ' ' + version + '\n\n'
-        )
+        # accumulate the changelog in a list and join once at the
+        # end instead of repeatedly concatenating strings
+        output = [f"# {self.config['header_prefix']} {version}\n\n"]
 
         group_config = self.config['group_config']
-        items_string = ''
 
         # If it's a point release, only grab things with the point release tag.
         if is_point_release:
-            for pull_request in pull_request_data:
-                if POINT_RELEASE_LABEL in pull_request['labels']:
-                    items_string += self._get_changelog_line(pull_request)
-            if items_string:
+            lines = [
+                self._get_changelog_line(pull_request)
+                for pull_request in pull_request_data
+                if POINT_RELEASE_LABEL in pull_request['labels_set']
+            ]
+            if lines:
                 if group_config:
-                    string_data += '\n#### ' + POINT_RELEASE_TITLE + '\n\n'
-                string_data += '\n' + items_string
+                    output.append(f'\n#### {POINT_RELEASE_TITLE}\n\n')
+                output.append('\n')
+                output.extend(lines)
 
         elif group_config:
+            # indexes of the items that already matched a group,
+            # so that one item does not match multiple groups
+            consumed = set()
+
             for config in group_config:
 
-                if len(pull_request_data) == 0:
+                if len(consumed) == len(pull_request_data):
                     break
 
-                items_string = ''
+                labels_set = config['labels_set']
+                lines = []
 
-                for pull_request in pull_request_data:
+                for index, pull_request in enumerate(pull_request_data):
+                    if index in consumed:
+                        continue
                     # check if the pull request label matches with
                     # any label of the config
-                    if (
-                        any(
-                            label in pull_request['labels']
-                            for label in config['labels']
-                        )
-                    ):
-                        items_string += self._get_changelog_line(pull_request)
-                        # remove the item so that one item
-                        # does not match multiple groups
-                        pull_request_data.remove(pull_request)
-
-                if items_string:
-                    string_data += '\n#### ' + config['title'] + '\n\n'
-                    string_data += '\n' + items_string
-
-            if pull_request_data:
+                    if not labels_set.isdisjoint(pull_request['labels_set']):
+                        lines.append(self._get_changelog_line(pull_request))
+                        consumed.add(index)
+
+                if lines:
+                    output.append(f"\n#### {config['title']}\n\n")
+                    output.append('\n')
+                    output.extend(lines)
+
+            leftover = [
+                pull_request
+                for index, pull_request in enumerate(pull_request_data)
+                if index not in consumed
+            ]
+
+            if leftover:
                 # if they do not match any user provided group
                 # Add items in ``Other Changes`` group
-                string_data += '\n#### Other Changes\n\n'
-                string_data += ''.join(map(self._get_changelog_line, pull_request_data))
+                output.append('\n#### Other Changes\n\n')
+                output.extend(map(self._get_changelog_line, leftover))
         else:
             # If group config does not exist then append it without groups
-            string_data += ''.join(map(self._get_changelog_line, pull_request_data))
-
-        return string_data
-
-    def _get_last_tag(self):
-        # Get the latest tag, sorted
-        result = subprocess.run('git tag -l --sort=-v:refname | head -n 1', shell=True, stdout=subprocess.PIPE,
-                                text=True)
-        last_tag = result.stdout.strip()
-        return last_tag
+            output.extend(map(self._get_changelog_line, pull_request_data))
 
+        return ''.join(output)
 
     def _commit_changelog(self, string_data):
         """Write changelog to the changelog file"""
-        file_mode = self._get_file_mode()
-
-        with open(self.filename, "r+") as f:
-            for line in f:
-                pass
-
-            regex_pattern = r".*\n"
-            pattern = re.compile(regex_pattern)
-            match = pattern.search(line)
-
-            if not match:
-                f.write("\n")
-
-        with open(self.filename, file_mode) as f:
-            # read the existing data and store it in a variable
-            body = f.read()
-            # write at the top of the file
-            f.seek(0, 0)
-            f.write(string_data)
-
-            if body:
-                # re-write the existing data
-                f.write('\n\n')
-                f.write(body)
-
-        subprocess.run(['git', 'add', self.filename])
-        subprocess.run(['git', 'commit', '-m', '(Changelog CI) Added Changelog'])
-        subprocess.run(['git', 'push', '-u', 'origin', head_ref])
-        last_tag = self._get_last_tag()
-        subprocess.run(['git', 'tag', '-d', last_tag])
-        subprocess.run(['git', 'push', '--delete', last_tag])
-        # Note: We have to use the format method here, github actions uses an older version of python that doesn't support fstrings
-        subprocess.run(['git', 'tag', '-a', last_tag, '-m', 'Release {last_tag}'.format(last_tag=last_tag)])
-        subprocess.run(['git', 'push', 'origin', last_tag])
+        changelog_file = Path(self.filename)
+        # prepend the new changelog to the existing file in one pass
+        body = changelog_file.read_text() if changelog_file.exists() else ''
+
+        if body:
+            string_data += '\n\n' + body
+
+        changelog_file.write_text(string_data)
+
+        # run all the git commands in a single shell invocation
+        # instead of paying a fork+exec per command; steps that may
+        # legitimately have nothing to do (nothing to commit, no tag
+        # to delete locally or on the remote) must not abort the rest
+        script = (
+            'set -e\n'
+            f'git add {shlex.quote(self.filename)}\n'
+            "git commit -m '(Changelog CI) Added Changelog' || true\n"
+            f'git push -u origin {shlex.quote(head_ref)}\n'
+            # Get the latest tag, sorted, without forking ``head``
+            'LAST_TAG=$(git for-each-ref --sort=-v:refname --count=1'
+            ' --format="%(refname:short)" refs/tags)\n'
+            'if [ -n "$LAST_TAG" ]; then\n'
+            '  git tag -d "$LAST_TAG" || true\n'
+            '  git push origin --delete "$LAST_TAG" || true\n'
+            '  git tag -a "$LAST_TAG" -m "Release $LAST_TAG"\n'
+            '  git push origin "$LAST_TAG"\n'
+            'fi\n'
+        )
+        subprocess.run(['bash', '-c', script], check=True)
 
     def is_point_release(self, end_version: str):
-        pattern = re.compile(POINT_RELEASE_PATTERN)
-
         # Match the version string against the pattern
-        match = pattern.match(end_version)
+        match = POINT_RELEASE_RE.match(end_version)
 
         if match:
             _, _, patch = map(int, match.groups())
@@ -415,10 +763,7 @@ class ChangelogCI:
             number=self.pull_request_number
         )
 
-        response = requests.post(
-            url, headers=self._get_request_headers(),
-            json=payload
-        )
+        response = self._session.post(url, json=payload)
 
         if response.status_code != 201:
             # API should return 201, otherwise show error message
@@ -447,7 +792,24 @@ class ChangelogCI:
             _print_output('error', msg)
             return
 
-        is_valid_pull_request = self._validate_pull_request()
+        self._load_event()
+
+        combined_match = None
+
+        if self._combined_re is not None:
+            combined_match = self._combined_re.search(self.pull_request_title)
+
+        if combined_match:
+            # the single pass already extracted everything
+            is_valid_pull_request = True
+            version = combined_match['ver']
+            tags = combined_match['tags']
+        else:
+            # scan the title separately, also producing the
+            # error message for whichever part did not match
+            is_valid_pull_request = self._validate_pull_request()
+            version = None
+            tags = None
 
         if not is_valid_pull_request:
             # if pull request regex doesn't match then exit
@@ -460,7 +822,8 @@ class ChangelogCI:
             _print_output('error', msg)
             return
 
-        version = self._get_version_number()
+        if version is None:
+            version = self._get_version_number()
 
         if not version:
             # if the pull request title is not valid, exit the method
@@ -475,7 +838,8 @@ class ChangelogCI:
             return
         version += f" ({datetime.now().strftime('%m/%d/%Y')})"
 
-        tags = self._validate_tags()
+        if tags is None:
+            tags = self._validate_tags()
         if not tags:
             # If tags don't match "X.X.X X.X.X", return error.
             msg = (
@@ -495,14 +859,27 @@ class ChangelogCI:
         is_point_release = self.is_point_release(end_version)
         string_data = self._parse_data(version, pull_request_data, is_point_release)
         if self.config['commit_changelog']:
-            subprocess.run(['echo', '::group::Commit Changelog'])
+            print('::group::Commit Changelog', flush=True)
             self._commit_changelog(string_data)
-            subprocess.run(['echo', '::endgroup::'])
+            print('::endgroup::', flush=True)
 
         if self.config['comment_changelog']:
-            subprocess.run(['echo', '::group::Comment Changelog'])
+            print('::group::Comment Changelog', flush=True)
             self._comment_changelog(string_data)
-            subprocess.run(['echo', '::endgroup::'])
+            print('::endgroup::', flush=True)
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_cached(pattern):
+    """Compile a regex pattern once and reuse the compiled object"""
+    return re.compile(pattern)
+
+
+# warm the cache for the default patterns at import time so no run
+# pays the compile cost of the big SemVer pattern more than once
+_compile_cached(DEFAULT_SEMVER_REGEX)
+_compile_cached(DEFAULT_PULL_REQUEST_TITLE_REGEX)
+_compile_cached(TAG_VERSIONS_REGEX)
 
 
 def parse_config(config):
@@ -522,7 +899,7 @@ def parse_config(config):
             raise KeyError
 
         # This will raise an error if the provided regex is not valid
-        re.compile(pull_request_title_regex)
+        _compile_cached(pull_request_title_regex)
     except Exception:
         msg = (
             '``pull_request_title_regex`` was not provided or not valid, '
@@ -542,7 +919,7 @@ def parse_config(config):
             raise KeyError
 
         # This will raise an error if the provided regex is not valid
-        re.compile(version_regex)
+        _compile_cached(version_regex)
     except Exception:
         msg = (
             '``version_regex`` was not provided or not valid, '
@@ -634,6 +1011,10 @@ def parse_config(config):
                 if not isinstance(labels, list):
                     raise TypeError('group_config labels must be an Array')
 
+                # precompute the label set once at parse time so
+                # matching in ``_parse_data`` is a set operation
+                config['labels_set'] = frozenset(labels)
+
         except Exception as e:
             msg = (
                 f'An error occurred while parsing ``group_config``. Error: {e}'
@@ -648,7 +1029,9 @@ def parse_config(config):
 
 def _print_output(type, message):
     """Helper function to print colorful outputs in GitHub Actions shell"""
-    return subprocess.run(['echo', f'::{type}::{message}'])
+    # workflow commands only need to reach stdout,
+    # no need to fork an ``echo`` process per message
+    print(f'::{type}::{message}', flush=True)
 
 
 if __name__ == '__main__':
@@ -673,19 +1056,30 @@ if __name__ == '__main__':
     subprocess.run(['git', 'config', '--global', '--add', 'safe.directory', '/github/workspace'])
 
     # Group: Checkout git repository
-    subprocess.run(['echo', '::group::Checkout git repository'])
-    subprocess.run(['git', 'fetch', '--prune', '--unshallow', 'origin',  head_ref])
-    subprocess.run(['git', 'checkout',  head_ref])
+    print('::group::Checkout git repository', flush=True)
+    # ``--unshallow`` fails on a repository that is already complete,
+    # e.g. a fetch-depth 0 checkout or a rerun, so only use it when
+    # the repository is actually shallow
+    checkout_script = (
+        'set -e\n'
+        'if [ "$(git rev-parse --is-shallow-repository)" = "true" ]; then\n'
+        f'  git fetch --prune --unshallow origin {shlex.quote(head_ref)}\n'
+        'else\n'
+        f'  git fetch --prune origin {shlex.quote(head_ref)}\n'
+        'fi\n'
+        f'git checkout {shlex.quote(head_ref)}\n'
+    )
+    subprocess.run(['bash', '-c', checkout_script], check=True)
 
-    subprocess.run(['echo', '::endgroup::'])
+    print('::endgroup::', flush=True)
 
     # Group: Configure Git
-    subprocess.run(['echo', '::group::Configure Git'])
+    print('::group::Configure Git', flush=True)
 
-    subprocess.run(['echo', '::endgroup::'])
+    print('::endgroup::', flush=True)
 
     # Group: Generate Changelog
-    subprocess.run(['echo', '::group::Generate Changelog'])
+    print('::group::Generate Changelog', flush=True)
     # Initialize the Changelog CI
     ci = ChangelogCI(
         repository, event_path, filename=filename,
@@ -694,4 +1088,4 @@ if __name__ == '__main__':
     # Run Changelog CI
     ci.run()
 
-    subprocess.run(['echo', '::endgroup::'])
+    print('::endgroup::', flush=True)